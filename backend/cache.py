@@ -0,0 +1,74 @@
+import hashlib
+from collections import OrderedDict
+from typing import Optional, Sequence
+import faiss
+import numpy as np
+
+class ResponseCache:
+    """LRU cache of chat answers keyed by exact and semantically similar questions."""
+
+    def __init__(self, dim: int, maxlen: int = 2048, threshold: float = 0.95):
+        self.maxlen = maxlen
+        self.threshold = threshold
+        self._index = faiss.IndexIDMap(faiss.IndexFlatIP(dim))
+        self._entries = OrderedDict()  # key -> (vector id, answer)
+        self._keys = {}  # vector id -> key
+        self._next_id = 0
+        self.generation = 0  # Bumped by clear() so in-flight answers can be discarded
+
+    @staticmethod
+    def _key(message: str) -> str:
+        normalized = " ".join(message.lower().split())
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize(vector: Sequence[float]) -> np.ndarray:
+        matrix = np.array([vector], dtype=np.float32)
+        faiss.normalize_L2(matrix)
+        return matrix
+
+    def get(self, message: str, vector: Sequence[float]) -> Optional[str]:
+        """Return a cached answer for the message or a near-duplicate of it."""
+        key = self._key(message)
+        if key not in self._entries and self._index.ntotal:
+            scores, ids = self._index.search(self._normalize(vector), 1)
+            if ids[0][0] != -1 and scores[0][0] > self.threshold:
+                key = self._keys[int(ids[0][0])]
+
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key][1]
+
+    def put(self, message: str, vector: Sequence[float], answer: str, generation: Optional[int] = None):
+        """Store an answer, evicting the least recently used entry when full.
+
+        If generation is given and the cache has been cleared since it was read,
+        the answer was built from stale data and is not stored.
+        """
+        if generation is not None and generation != self.generation:
+            return
+        
+        key = self._key(message)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._entries[key] = (self._entries[key][0], answer)
+            return
+
+        vector_id = self._next_id
+        self._next_id += 1
+        self._index.add_with_ids(self._normalize(vector), np.array([vector_id], dtype=np.int64))
+        self._entries[key] = (vector_id, answer)
+        self._keys[vector_id] = key
+
+        if len(self._entries) > self.maxlen:
+            _, (evicted_id, _) = self._entries.popitem(last=False)
+            del self._keys[evicted_id]
+            self._index.remove_ids(np.array([evicted_id], dtype=np.int64))
+
+    def clear(self):
+        """Drop every cached answer."""
+        self._index.reset()
+        self._entries.clear()
+        self._keys.clear()
+        self.generation += 1
@@ -1,20 +1,31 @@
 import os
+import asyncio
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBasic
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from dotenv import load_dotenv
-from models import ExecutiveOrder
-from database import get_db, init_db
+from models import ExecutiveOrder, DocumentChunk
+from database import SessionLocal, get_db, init_db
 from processor import DocumentProcessor
+from cache import ResponseCache
 from scraper import EOScraper
 from pydantic import BaseModel
 from langchain_openai import OpenAI, OpenAIEmbeddings, ChatOpenAI
 from langchain.vectorstores.faiss import FAISS
+from langchain.vectorstores.utils import DistanceStrategy
+from langchain.docstore.in_memory import InMemoryDocstore
+from langchain.schema import Document, HumanMessage, SystemMessage
+import faiss
 import logging
 import json
+from collections import OrderedDict
+from itertools import groupby
+from operator import itemgetter
+import numpy as np
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -48,12 +59,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-engine = init_db()
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
+# Shared OpenAI clients, reused across requests
+EMBEDDINGS = OpenAIEmbeddings(api_key=openai_api_key) if openai_api_key else None
+LLM = ChatOpenAI(
+    api_key=openai_api_key,
+    model="gpt-4-turbo-preview",
+    temperature=0
+) if openai_api_key else None
+
 # Rate limit configuration
 RATE_LIMIT = os.getenv("RATE_LIMIT", "20/minute")  # Default: 20 requests per minute
 
+# Vector store configuration
+FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH", "faiss_index")
+EMBEDDING_DIM = 1536  # Dimension of OpenAI text-embedding-ada-002 vectors
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+# Cached vector store, built at startup and refreshed after ingestion
+VECTORSTORE: Optional[FAISS] = None
+
+# LRU cache of query embeddings keyed by chat message
+QUERY_EMBEDDING_CACHE_SIZE = 4096
+_QUERY_EMBEDDINGS: OrderedDict = OrderedDict()
+
+# Static instructions placed first in every prompt so OpenAI can reuse its prompt cache
+SYSTEM_PROMPT_PREFIX = """You are an AI assistant that helps users understand executive orders and government actions. 
+Your responses should be clear, accurate, and based on the provided context from executive orders.
+
+Please provide a clear and informative response based on the executive orders and context provided. If you cannot find relevant information in the context, say so."""
+
+# Cached executive order summary, invalidated after ingestion
+_EO_SUMMARY: Optional[str] = None
+_EO_SUMMARY_VERSION = 0
+
+# Cached answers to standalone questions, cleared after ingestion
+RESPONSE_CACHE = ResponseCache(EMBEDDING_DIM)
+
 @app.middleware("http")
 async def add_security_headers(request: Request, call_next):
     response = await call_next(request)
@@ -64,56 +108,163 @@ async def add_security_headers(request: Request, call_next):
         response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
     return response
 
-# Dependency to get database session
-def get_db():
-    db = Session(engine)
-    try:
-        yield db
-    finally:
-        db.close()
-
 class ChatRequest(BaseModel):
     message: str
     chat_history: List[dict] = []
 
 logger = logging.getLogger(__name__)
 
-def generate_eo_summary(db: Session) -> str:
+def _build_vectorstore(texts: List[str], metadatas: List[dict], matrix: np.ndarray) -> FAISS:
+    """Build an HNSW-backed FAISS vector store from the embedding matrix and persist it."""
+    # Use an HNSW graph index over unit vectors so inner product gives cosine similarity.
+    # Query vectors are not normalized here; OpenAI embeddings are already unit length.
+    faiss.normalize_L2(matrix)
+    index = faiss.index_factory(EMBEDDING_DIM, "HNSW32", faiss.METRIC_INNER_PRODUCT)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.add(matrix)
+    index.hnsw.efSearch = HNSW_EF_SEARCH
+
+    vectorstore = FAISS(
+        embedding_function=EMBEDDINGS,
+        index=index,
+        docstore=InMemoryDocstore({
+            str(i): Document(page_content=text, metadata=metadata)
+            for i, (text, metadata) in enumerate(zip(texts, metadatas))
+        }),
+        index_to_docstore_id={i: str(i) for i in range(len(texts))},
+        distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+    )
+    vectorstore.save_local(FAISS_INDEX_PATH)
+    return vectorstore
+
+async def rebuild_vectorstore(db: AsyncSession) -> Optional[FAISS]:
+    """Rebuild the FAISS index from the stored chunk embeddings and persist it."""
+    global VECTORSTORE
+
+    # Fetch chunks joined to their executive order in one query rather than per order
+    chunks = select(
+        DocumentChunk.content,
+        DocumentChunk.embedding,
+        ExecutiveOrder.order_number
+    ).join(ExecutiveOrder)
+
+    count = await db.scalar(select(func.count()).select_from(chunks.subquery()))
+    if not count:
+        logger.info("No document chunks found, skipping vector store build")
+        VECTORSTORE = None
+        return None
+
+    # Stream the chunks into a preallocated matrix instead of loading ORM objects
+    texts = []
+    metadatas = []
+    matrix = np.empty((count, EMBEDDING_DIM), dtype=np.float32)
+    rows = await db.stream(chunks.execution_options(yield_per=1000))
+    i = 0
+    async for content, embedding, order_number in rows:
+        if i == count:
+            # Rows were added after counting; they will be picked up by the next rebuild
+            break
+        texts.append(content)
+        metadatas.append({"order_number": order_number})
+        matrix[i] = np.frombuffer(embedding, dtype=np.float32)
+        i += 1
+    await rows.close()
+    # Drop unfilled rows if chunks were removed after counting
+    matrix = matrix[:i]
+
+    # Building and saving the index is CPU-bound, so keep it off the event loop
+    VECTORSTORE = await asyncio.to_thread(_build_vectorstore, texts, metadatas, matrix)
+    logger.info(f"Built vector store with {len(texts)} chunks")
+    return VECTORSTORE
+
+def get_vectorstore() -> Optional[FAISS]:
+    """Return the cached vector store, loading the persisted index if needed."""
+    global VECTORSTORE
+
+    if VECTORSTORE is None and os.path.isdir(FAISS_INDEX_PATH):
+        VECTORSTORE = FAISS.load_local(
+            FAISS_INDEX_PATH,
+            EMBEDDINGS,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
+        )
+        VECTORSTORE.index.hnsw.efSearch = HNSW_EF_SEARCH
+    return VECTORSTORE
+
+async def _embed_query(message: str) -> tuple[float, ...]:
+    """Embed a chat message, caching the result for repeated questions."""
+    if message in _QUERY_EMBEDDINGS:
+        _QUERY_EMBEDDINGS.move_to_end(message)
+        return _QUERY_EMBEDDINGS[message]
+
+    embedding = tuple(await EMBEDDINGS.aembed_query(message))
+    _QUERY_EMBEDDINGS[message] = embedding
+    if len(_QUERY_EMBEDDINGS) > QUERY_EMBEDDING_CACHE_SIZE:
+        _QUERY_EMBEDDINGS.popitem(last=False)
+    return embedding
+
+@app.on_event("startup")
+async def startup():
+    await init_db()
+
+    if not openai_api_key:
+        logger.warning("OpenAI API key not configured, skipping vector store load")
+        return
+
+    if get_vectorstore() is None:
+        async with SessionLocal() as db:
+            await rebuild_vectorstore(db)
+
+async def generate_eo_summary(db: AsyncSession) -> str:
     """Generate a summary of executive orders by administration and year."""
     
-    # Get all executive orders ordered by date
-    eos = db.query(ExecutiveOrder).order_by(ExecutiveOrder.date_signed).all()
-    
-    # Group by administration and year
-    admin_summary = {}
-    for eo in eos:
-        year = eo.date_signed.year
-        admin = eo.administration
-        if admin not in admin_summary:
-            admin_summary[admin] = {"total": 0, "years": {}}
-        if year not in admin_summary[admin]["years"]:
-            admin_summary[admin]["years"][year] = []
-        admin_summary[admin]["years"][year].append(eo)
-        admin_summary[admin]["total"] += 1
+    # Get executive orders sorted so they can be grouped by administration and year
+    rows = await db.execute(
+        select(
+            ExecutiveOrder.administration,
+            func.strftime('%Y', ExecutiveOrder.date_signed),
+            ExecutiveOrder.order_number,
+            ExecutiveOrder.title
+        ).order_by(ExecutiveOrder.administration, ExecutiveOrder.date_signed)
+    )
     
     # Build summary text
     summary = []
-    for admin, data in admin_summary.items():
-        admin_lines = [f"\n{admin}:"]
-        admin_lines.append(f"Total Executive Orders: {data['total']}")
+    for admin, admin_rows in groupby(rows, key=itemgetter(0)):
+        admin_rows = list(admin_rows)
+        summary.append(f"\n{admin}:")
+        summary.append(f"Total Executive Orders: {len(admin_rows)}")
         
-        for year, eos in sorted(data["years"].items()):
-            year_eos = [f"EO {eo.order_number}: {eo.title}" for eo in eos]
-            admin_lines.append(f"\n{year} ({len(eos)} orders):")
-            admin_lines.extend([f"- {eo}" for eo in year_eos])
-        
-        summary.extend(admin_lines)
+        for year, year_rows in groupby(admin_rows, key=itemgetter(1)):
+            year_rows = list(year_rows)
+            summary.append(f"\n{year} ({len(year_rows)} orders):")
+            summary.extend(f"- EO {order_number}: {title}" for _, _, order_number, title in year_rows)
     
     return "\n".join(summary)
 
+async def get_eo_summary(db: AsyncSession) -> str:
+    """Return the cached executive order summary, generating it if needed."""
+    global _EO_SUMMARY
+
+    if _EO_SUMMARY is not None:
+        return _EO_SUMMARY
+
+    version = _EO_SUMMARY_VERSION
+    summary = await generate_eo_summary(db)
+    # Don't cache a summary that an ingest invalidated while it was being generated
+    if version == _EO_SUMMARY_VERSION:
+        _EO_SUMMARY = summary
+    return summary
+
+def invalidate_eo_summary():
+    """Drop the cached executive order summary after new orders are stored."""
+    global _EO_SUMMARY, _EO_SUMMARY_VERSION
+
+    _EO_SUMMARY = None
+    _EO_SUMMARY_VERSION += 1
+
 @app.post("/api/ingest")
 @limiter.limit(RATE_LIMIT)
-async def ingest_documents(request: Request, db: Session = Depends(get_db)):
+async def ingest_documents(request: Request, db: AsyncSession = Depends(get_db)):
     if not openai_api_key:
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
     
@@ -127,6 +278,9 @@ async def ingest_documents(request: Request, db: Session = Depends(get_db)):
             logger.info(f"Starting to scrape executive orders for {year}")
             eos = await scraper.scrape_executive_orders(db, year=year)
             if eos:
+                # New executive orders were stored, so the cached summary and answers are stale
+                invalidate_eo_summary()
+                RESPONSE_CACHE.clear()
                 total_eos.extend(eos)
                 logger.info(f"Successfully scraped {len(eos)} executive orders for {year}")
             else:
@@ -146,14 +300,34 @@ async def ingest_documents(request: Request, db: Session = Depends(get_db)):
         logger.error(f"Error processing documents: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing documents: {str(e)}")
     
+    # Refresh the vector store with the new chunks, then drop answers built from the old one
+    await rebuild_vectorstore(db)
+    RESPONSE_CACHE.clear()
+    
     return {"message": f"Processed {len(total_eos)} new executive orders"}
 
 @app.post("/api/chat")
 @limiter.limit(RATE_LIMIT)
-async def chat(request: Request, chat_request: ChatRequest, db: Session = Depends(get_db)):
+async def chat(request: Request, chat_request: ChatRequest, db: AsyncSession = Depends(get_db)):
     if not openai_api_key:
         raise HTTPException(status_code=500, detail="OpenAI API key not configured")
 
+    # Read before retrieval so an answer built from data replaced by an ingest is not cached
+    cache_generation = RESPONSE_CACHE.generation
+
+    vectorstore = get_vectorstore()
+    if vectorstore is None:
+        raise HTTPException(status_code=503, detail="No executive orders have been ingested yet")
+
+    query_vector = list(await _embed_query(chat_request.message))
+
+    # Answers only depend on the question when there is no prior conversation
+    use_cache = not chat_request.chat_history
+    if use_cache:
+        cached_response = RESPONSE_CACHE.get(chat_request.message, query_vector)
+        if cached_response is not None:
+            return {"response": cached_response, "sources": []}
+
     # Format chat history
     formatted_history = ""
     if chat_request.chat_history:
@@ -161,48 +335,28 @@ async def chat(request: Request, chat_request: ChatRequest, db: Session = Depend
             if msg.get('human') and msg.get('ai'):
                 formatted_history += f"Human: {msg['human']}\nAssistant: {msg['ai']}\n\n"
 
-    # Generate EO summary
-    eo_summary = generate_eo_summary(db)
-
-    # Initialize OpenAI
-    llm = ChatOpenAI(
-        api_key=openai_api_key,
-        model="gpt-4-turbo-preview",
-        temperature=0
-    )
+    # Get EO summary
+    eo_summary = await get_eo_summary(db)
 
-    embeddings = OpenAIEmbeddings(
-        api_key=openai_api_key
-    )
-
-    # Create vector store
-    vectorstore = FAISS.from_texts(
-        [chunk.content for eo in db.query(ExecutiveOrder).all() for chunk in eo.chunks],
-        embeddings
-    )
-    
     # Get relevant documents
-    docs = vectorstore.similarity_search(chat_request.message, k=3)
+    docs = vectorstore.similarity_search_by_vector(query_vector, k=3)
     context = "\n\n".join(doc.page_content for doc in docs)
     
-    # Create prompt
-    prompt = f"""You are an AI assistant that helps users understand executive orders and government actions. 
-Your responses should be clear, accurate, and based on the provided context from executive orders.
-
-Executive Order Summary:
-{eo_summary}
-
-Current conversation:
+    # Create prompt, keeping the per-request parts after the static prefix and summary
+    messages = [
+        SystemMessage(content=f"{SYSTEM_PROMPT_PREFIX}\n\nExecutive Order Summary:\n{eo_summary}"),
+        HumanMessage(content=f"""Current conversation:
 {formatted_history}
 
 Question: {chat_request.message}
 
 Additional context from the executive orders:
-{context}
-
-Please provide a clear and informative response based on the executive orders and context provided. If you cannot find relevant information in the context, say so."""
+{context}""")
+    ]
 
     # Get response from OpenAI
-    response = llm.invoke(prompt)
+    response = await LLM.ainvoke(messages)
+    if use_cache:
+        RESPONSE_CACHE.put(chat_request.message, query_vector, response.content, cache_generation)
     
     return {"response": response.content, "sources": []}
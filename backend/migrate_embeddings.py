@@ -0,0 +1,50 @@
+"""One-time migration converting JSON-encoded chunk embeddings to raw float32 bytes.
+
+Run from the backend directory:
+    python migrate_embeddings.py
+"""
+import asyncio
+import json
+import logging
+import numpy as np
+from sqlalchemy import text
+from database import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def migrate_embeddings(batch_size: int = 1000) -> int:
+    """Rewrite every embedding still stored as JSON text as float32 bytes."""
+    migrated = 0
+    last_id = 0
+    async with engine.begin() as conn:
+        # Page through the rows by id so the batch size also bounds how much JSON is read at once
+        while True:
+            result = await conn.execute(
+                text(
+                    "SELECT id, embedding FROM document_chunks "
+                    "WHERE typeof(embedding) = 'text' AND id > :last_id "
+                    "ORDER BY id LIMIT :batch_size"
+                ),
+                {"last_id": last_id, "batch_size": batch_size}
+            )
+            batch = result.fetchall()
+            if not batch:
+                break
+
+            await conn.execute(
+                text("UPDATE document_chunks SET embedding = :embedding WHERE id = :id"),
+                [
+                    {"id": row_id, "embedding": np.asarray(json.loads(embedding), dtype=np.float32).tobytes()}
+                    for row_id, embedding in batch
+                ]
+            )
+            migrated += len(batch)
+            last_id = batch[-1][0]
+            logger.info(f"Migrated {migrated} embeddings")
+
+    return migrated
+
+if __name__ == "__main__":
+    count = asyncio.run(migrate_embeddings())
+    logger.info(f"Finished migrating {count} embeddings")
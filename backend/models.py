@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -6,7 +6,7 @@ class ExecutiveOrder(Base):
     __tablename__ = "executive_orders"
     
     id = Column(Integer, primary_key=True)
-    order_number = Column(String, unique=True)
+    order_number = Column(String, unique=True, index=True)
     title = Column(String)
     date_signed = Column(DateTime)
     president = Column(String)  # e.g., "Joseph R. Biden", "Donald J. Trump"
@@ -14,6 +14,10 @@ class ExecutiveOrder(Base):
     url = Column(String)
     full_text = Column(Text)
     chunks = relationship("DocumentChunk", back_populates="executive_order")
+    
+    __table_args__ = (
+        Index("ix_eo_admin_date", "administration", "date_signed"),
+    )
 
 class DocumentChunk(Base):
     __tablename__ = "document_chunks"
@@ -22,13 +26,10 @@ class DocumentChunk(Base):
     executive_order_id = Column(Integer, ForeignKey("executive_orders.id"))
     content = Column(Text)
     chunk_index = Column(Integer)
-    embedding = Column(Text)  # Store as JSON string
+    embedding = Column(LargeBinary)  # Store as raw float32 bytes
     
     executive_order = relationship("ExecutiveOrder", back_populates="chunks")
-
-def init_db():
-    """Initialize the database if it doesn't exist."""
-    engine = create_engine("sqlite:///./policypal.db")
-    # create_all is safe to call multiple times - it will not recreate tables that already exist
-    Base.metadata.create_all(engine)
-    return engine
+    
+    __table_args__ = (
+        Index("ix_chunks_eo", "executive_order_id"),
+    )
@@ -1,10 +1,14 @@
-import json
+import numpy as np
 from typing import List
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import ExecutiveOrder, DocumentChunk
 
+# Number of chunks sent per embeddings request (OpenAI allows up to 2048 inputs)
+EMBEDDING_BATCH_SIZE = 128
+
 class DocumentProcessor:
     def __init__(self, openai_api_key: str):
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -14,29 +18,32 @@ class DocumentProcessor:
         )
         self.embeddings = OpenAIEmbeddings(openai_api_key=openai_api_key)
     
-    async def process_document(self, db: Session, executive_order: ExecutiveOrder):
-        # Split the document into chunks
-        chunks = self.text_splitter.split_text(executive_order.full_text)
-        
-        # Create embeddings for each chunk
-        embeddings = await self.embeddings.aembed_documents(chunks)
+    async def process_all_documents(self, db: AsyncSession):
+        # Stream just the id and text of unprocessed documents instead of loading ORM objects
+        unprocessed_docs = await db.stream(
+            select(ExecutiveOrder.id, ExecutiveOrder.full_text)
+            .where(~ExecutiveOrder.chunks.any())
+            .execution_options(yield_per=100)
+        )
         
-        # Store chunks and embeddings
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-            doc_chunk = DocumentChunk(
-                executive_order_id=executive_order.id,
-                content=chunk,
-                chunk_index=i,
-                embedding=json.dumps(embedding)
-            )
-            db.add(doc_chunk)
+        # Split every unprocessed document up front so chunks can be embedded in batches
+        pending = []
+        async for doc_id, full_text in unprocessed_docs:
+            chunks = self.text_splitter.split_text(full_text)
+            pending.extend((doc_id, i, chunk) for i, chunk in enumerate(chunks))
         
-        db.commit()
-    
-    async def process_all_documents(self, db: Session):
-        unprocessed_docs = db.query(ExecutiveOrder)\
-            .filter(~ExecutiveOrder.chunks.any())\
-            .all()
+        # Embed and store chunks one batch at a time
+        for start in range(0, len(pending), EMBEDDING_BATCH_SIZE):
+            batch = pending[start:start + EMBEDDING_BATCH_SIZE]
+            embeddings = await self.embeddings.aembed_documents([chunk for _, _, chunk in batch])
+            await db.execute(insert(DocumentChunk), [
+                {
+                    "executive_order_id": doc_id,
+                    "content": chunk,
+                    "chunk_index": i,
+                    "embedding": np.asarray(embedding, dtype=np.float32).tobytes()
+                }
+                for (doc_id, i, chunk), embedding in zip(batch, embeddings)
+            ])
         
-        for doc in unprocessed_docs:
-            await self.process_document(db, doc)
+        await db.commit()
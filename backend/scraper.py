@@ -5,8 +5,9 @@ import logging
 from bs4 import BeautifulSoup
 from datetime import datetime
 import re
-from sqlalchemy.orm import Session
-from typing import List, Dict, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlencode
 from models import ExecutiveOrder, DocumentChunk
 
@@ -19,41 +20,50 @@ logger = logging.getLogger(__name__)
 
 class EOScraper:
     BASE_URL = "https://www.federalregister.gov/api/v1/documents"
+    BASE_PARAMS = (
+        ('conditions[type][]', 'PRESDOCU'),
+        ('conditions[presidential_document_type][]', 'executive_order'),
+        ('conditions[correction]', '0'),
+        ('fields[]', 'executive_order_number'),
+        ('fields[]', 'title'),
+        ('fields[]', 'raw_text_url'),
+        ('fields[]', 'html_url'),
+        ('fields[]', 'signing_date'),
+        ('fields[]', 'publication_date'),
+        ('fields[]', 'president'),
+        ('fields[]', 'executive_order_notes'),
+        ('fields[]', 'disposition_notes'),
+        ('per_page', '100'),
+        ('order', 'executive_order_number'),
+    )
+    MAX_CONCURRENT_FETCHES = 10
+    
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
     
     async def fetch_page(self, url: str) -> str:
         """Fetch a page from a URL."""
+        if self._session is None:
+            async with aiohttp.ClientSession() as session:
+                return await self._fetch_page(session, url)
+        return await self._fetch_page(self._session, url)
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, url: str) -> str:
         logger.info(f"Fetching URL: {url}")
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        logger.error(f"Error fetching {url}: Status {response.status}")
-                        logger.error(f"Response: {await response.text()}")
-                        return None
-                    return await response.text()
+            async with session.get(url) as response:
+                if response.status != 200:
+                    logger.error(f"Error fetching {url}: Status {response.status}")
+                    logger.error(f"Response: {await response.text()}")
+                    return None
+                return await response.text()
         except Exception as e:
             logger.error(f"Exception fetching {url}: {str(e)}")
             return None
 
     def build_api_url(self, year: int) -> str:
         """Build the API URL for fetching Executive Orders."""
-        params = [
-            ('conditions[type][]', 'PRESDOCU'),
-            ('conditions[presidential_document_type][]', 'executive_order'),
-            ('conditions[correction]', '0'),
-            ('fields[]', 'executive_order_number'),
-            ('fields[]', 'title'),
-            ('fields[]', 'raw_text_url'),
-            ('fields[]', 'html_url'),
-            ('fields[]', 'signing_date'),
-            ('fields[]', 'publication_date'),
-            ('fields[]', 'president'),
-            ('fields[]', 'executive_order_notes'),
-            ('fields[]', 'disposition_notes'),
-            ('per_page', '100'),
-            ('order', 'executive_order_number'),
-            ('conditions[publication_date][year]', str(year))
-        ]
+        params = self.BASE_PARAMS + (('conditions[publication_date][year]', str(year)),)
         
         query_string = urlencode(params, doseq=True)
         url = f"{self.BASE_URL}?{query_string}"
@@ -68,11 +78,15 @@ class EOScraper:
             return ""
         return content
 
+    async def _fetch_eo_text_limited(self, semaphore: asyncio.Semaphore, raw_text_url: str) -> str:
+        async with semaphore:
+            return await self.fetch_eo_text(raw_text_url)
+
     async def parse_eo_response(self, json_content: str) -> List[Dict]:
         """Parse the response from the Federal Register API."""
         try:
             data = json.loads(json_content)
-            eo_items = []
+            pending_items = []
             
             for result in data.get('results', []):
                 # Extract the EO number from the executive_order_number field
@@ -83,22 +97,16 @@ class EOScraper:
                 
                 # Parse the signing date
                 try:
-                    date = datetime.strptime(result.get('signing_date', ''), '%Y-%m-%d')
+                    date = datetime.fromisoformat(result.get('signing_date', ''))
                 except ValueError as e:
                     logger.error(f"Failed to parse signing date for EO {eo_number}: {e}")
                     continue
                 
-                # Fetch the full text
                 raw_text_url = result.get('raw_text_url')
                 if not raw_text_url:
                     logger.warning(f"No raw text URL found for EO {eo_number}")
                     continue
                 
-                full_text = await self.fetch_eo_text(raw_text_url)
-                if not full_text:
-                    logger.error(f"Failed to fetch full text for EO {eo_number}")
-                    continue
-                
                 # Determine president and administration using the API's president data
                 president, administration = self.determine_president_and_administration(result.get('president'))
                 
@@ -107,12 +115,26 @@ class EOScraper:
                     'url': result.get('html_url', ''),
                     'date': date,
                     'order_number': str(eo_number),
-                    'full_text': full_text,
                     'president': president,
                     'administration': administration
                 }
+                pending_items.append((eo_data, raw_text_url))
+            
+            # Fetch the full texts concurrently
+            semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FETCHES)
+            full_texts = await asyncio.gather(*[
+                self._fetch_eo_text_limited(semaphore, raw_text_url)
+                for _, raw_text_url in pending_items
+            ])
+            
+            eo_items = []
+            for (eo_data, _), full_text in zip(pending_items, full_texts):
+                if not full_text:
+                    logger.error(f"Failed to fetch full text for EO {eo_data['order_number']}")
+                    continue
                 
-                logger.info(f"Found EO {eo_data['order_number']} - {eo_data['title']} (Signed: {eo_data['date']}, President: {president})")
+                eo_data['full_text'] = full_text
+                logger.info(f"Found EO {eo_data['order_number']} - {eo_data['title']} (Signed: {eo_data['date']}, President: {eo_data['president']})")
                 eo_items.append(eo_data)
             
             logger.info(f"Found {len(eo_items)} Executive Orders")
@@ -135,39 +157,50 @@ class EOScraper:
         else:
             return president_name, f"{president_name.split()[-1]} Administration"
 
-    async def scrape_executive_orders(self, db: Session, year: int = 2024) -> List[ExecutiveOrder]:
+    async def scrape_executive_orders(self, db: AsyncSession, year: int = 2024) -> List[ExecutiveOrder]:
         logger.info(f"Starting to scrape Executive Orders for year {year}")
         
         # Build the API URL
         api_url = self.build_api_url(year)
         logger.info(f"Built API URL: {api_url}")
         
-        # Fetch the data from the Federal Register API
-        json_content = await self.fetch_page(api_url)
-        if not json_content:
-            logger.error("Failed to fetch data from Federal Register API")
-            return []
+        # Share one connection pool across the API request and all EO text fetches
+        connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            self._session = session
+            try:
+                # Fetch the data from the Federal Register API
+                json_content = await self.fetch_page(api_url)
+                if not json_content:
+                    logger.error("Failed to fetch data from Federal Register API")
+                    return []
+        
+                logger.info("Successfully fetched data from Federal Register API")
+                logger.info(f"Response preview: {json_content[:500]}")
+        
+                eo_items = await self.parse_eo_response(json_content)
+            finally:
+                self._session = None
         
-        logger.info("Successfully fetched data from Federal Register API")
-        logger.info(f"Response preview: {json_content[:500]}")
-            
-        eo_items = await self.parse_eo_response(json_content)
         logger.info(f"Parsed {len(eo_items)} executive orders from response")
         
-        # Process each EO and add to database
+        # Look up which of the parsed EOs already exist in a single query
+        result = await db.execute(
+            select(ExecutiveOrder.order_number).where(
+                ExecutiveOrder.order_number.in_([eo_info['order_number'] for eo_info in eo_items])
+            )
+        )
+        existing_numbers = set(result.scalars().all())
+        
+        # Build the new EOs and add them to the database in one transaction
         eos = []
         for eo_info in eo_items:
-            # Check if EO already exists
-            existing_eo = db.query(ExecutiveOrder).filter_by(
-                order_number=eo_info['order_number']
-            ).first()
-            
-            if existing_eo:
+            if eo_info['order_number'] in existing_numbers:
                 logger.info(f"EO {eo_info['order_number']} already exists in database")
                 continue
+            existing_numbers.add(eo_info['order_number'])
             
-            # Create new EO
-            eo = ExecutiveOrder(
+            eos.append(ExecutiveOrder(
                 order_number=eo_info['order_number'],
                 title=eo_info['title'],
                 date_signed=eo_info['date'],
@@ -175,16 +208,16 @@ class EOScraper:
                 administration=eo_info['administration'],
                 url=eo_info['url'],
                 full_text=eo_info['full_text']
-            )
-            
-            try:
-                db.add(eo)
-                db.commit()
-                eos.append(eo)
-                logger.info(f"Successfully added EO {eo_info['order_number']} to database")
-            except Exception as e:
-                db.rollback()
-                logger.error(f"Failed to add EO {eo_info['order_number']} to database: {str(e)}")
+            ))
+        
+        try:
+            db.add_all(eos)
+            await db.commit()
+            logger.info(f"Successfully added {len(eos)} EOs to database")
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Failed to add EOs to database: {str(e)}")
+            return []
         
         logger.info(f"Finished processing {len(eos)} new executive orders")
         return eos